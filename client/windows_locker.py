@@ -1,10 +1,17 @@
 import ctypes
+import ctypes.wintypes
+import random
+import shutil
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import subprocess
 import threading
 import logging
+import socket
+import sys
 from typing import Optional
+from urllib.parse import urlsplit
 import os
 
 # Configure logging
@@ -13,23 +20,162 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Win32 definitions for the session-change notification window
+WM_DESTROY = 0x0002
+WM_CLOSE = 0x0010
+WM_WTSSESSION_CHANGE = 0x02B1
+WTS_SESSION_LOCK = 0x7
+WTS_SESSION_UNLOCK = 0x8
+NOTIFY_FOR_THIS_SESSION = 0
+
+# ctypes only provides WINFUNCTYPE on Windows; keep the module importable
+# elsewhere so the non-Win32 logic can still be tested and linted
+if sys.platform == "win32":
+    HWND_MESSAGE = ctypes.wintypes.HWND(-3)
+
+    LRESULT = ctypes.wintypes.LPARAM
+    WNDPROC = ctypes.WINFUNCTYPE(
+        LRESULT,
+        ctypes.wintypes.HWND,
+        ctypes.wintypes.UINT,
+        ctypes.wintypes.WPARAM,
+        ctypes.wintypes.LPARAM,
+    )
+
+    class WNDCLASSW(ctypes.Structure):
+        _fields_ = [
+            ("style", ctypes.wintypes.UINT),
+            ("lpfnWndProc", WNDPROC),
+            ("cbClsExtra", ctypes.c_int),
+            ("cbWndExtra", ctypes.c_int),
+            ("hInstance", ctypes.wintypes.HINSTANCE),
+            ("hIcon", ctypes.wintypes.HICON),
+            ("hCursor", ctypes.wintypes.HANDLE),
+            ("hbrBackground", ctypes.wintypes.HBRUSH),
+            ("lpszMenuName", ctypes.wintypes.LPCWSTR),
+            ("lpszClassName", ctypes.wintypes.LPCWSTR),
+        ]
+
 
 class WindowsLocker:
-    def __init__(self, api_url: str, dns_timer_api_url: str):
-        self.api_url = api_url
-        self.dns_timer_api_url = dns_timer_api_url
+    # Default seconds the server may hold a state request open
+    # waiting for a change; also the lock enforcement cadence when nothing
+    # changes. The server can override it per client.
+    DEFAULT_POLL_INTERVAL = 5
+
+    SESSION_WINDOW_CLASS = "WindowsLockerSessionMonitor"
+
+    # Seconds before the server hostname is resolved again
+    DNS_REFRESH_SECONDS = 3600
+
+    HOSTS_PATH = r"C:\Windows\System32\drivers\etc\hosts"
+    YOUTUBE_DOMAINS = (
+        "youtube.com",
+        "www.youtube.com",
+        "m.youtube.com",
+        "youtu.be",
+    )
+    # Hosts file lines that redirect the YouTube domains to localhost
+    BLOCKED_HOSTS_ENTRIES = frozenset(f"127.0.0.1 {d}" for d in YOUTUBE_DOMAINS)
+
+    # Seconds the DNS manager waits for the first state fetch
+    STATE_READY_TIMEOUT = 30
+
+    def __init__(self, state_api_url: str):
+        # URL as configured; state_api_url may point at the resolved server
+        # address instead (see resolve_server_address)
+        self.server_state_api_url = state_api_url
+        self.state_api_url = state_api_url
+        self._server_resolved_at: Optional[float] = None
         self.is_locked = False
         self.dns_thread = None
-        self.stop_dns_thread = False
+        self._stop_event = threading.Event()
+        # mtime of the hosts file when it was last known to be compliant
+        self._hosts_mtime: Optional[float] = None
+        # Last state version seen; None forces an immediate answer
+        self._state_version: Optional[int] = None
+        # Latest state from the server, shared with the DNS manager thread
+        self._state_lock = threading.Lock()
+        self._latest_state: Optional[dict] = None
+        self._state_ready = threading.Event()
+        self.poll_interval = self.DEFAULT_POLL_INTERVAL
+        # Last lock state requested by the server
+        self.should_be_unlocked = False
+        # Session lock state from WTS notifications; None until the session
+        # monitor is running, in which case the foreground-window check is used
+        self._session_locked: Optional[bool] = None
+        self.session_thread = None
+        self._session_hwnd = None
+        self._session_wndproc = None
+
+        # Reuse one keep-alive connection for all polls; transient server
+        # errors are retried by urllib3 instead of a manual loop
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Connection"] = "keep-alive"
+        self.resolve_server_address()
 
         # Load Windows API
         self.user32 = ctypes.windll.user32
         self.kernel32 = ctypes.windll.kernel32
+        self.wtsapi32 = ctypes.windll.wtsapi32
+        self.dnsapi = ctypes.windll.dnsapi
+
+        # Bind frequently called functions once, with explicit signatures,
+        # instead of resolving them through the DLL object on each call
+        self._GetForegroundWindow = self.user32.GetForegroundWindow
+        self._GetForegroundWindow.argtypes = []
+        self._GetForegroundWindow.restype = ctypes.c_void_p
+        self._LockWorkStation = self.user32.LockWorkStation
+        self._LockWorkStation.argtypes = []
+        self._LockWorkStation.restype = ctypes.c_int
+        self._DnsFlushResolverCache = self.dnsapi.DnsFlushResolverCache
+        self._DnsFlushResolverCache.argtypes = []
+        self._DnsFlushResolverCache.restype = ctypes.c_int
+        self.user32.DefWindowProcW.argtypes = [
+            ctypes.wintypes.HWND,
+            ctypes.wintypes.UINT,
+            ctypes.wintypes.WPARAM,
+            ctypes.wintypes.LPARAM,
+        ]
+        self.user32.DefWindowProcW.restype = LRESULT
+        self.user32.CreateWindowExW.restype = ctypes.wintypes.HWND
+        self.kernel32.GetModuleHandleW.restype = ctypes.wintypes.HMODULE
+
+    def resolve_server_address(self):
+        """Resolve the server hostname once and send requests to its address
+
+        Avoids a blocking getaddrinfo call for every new connection. Only
+        plain HTTP is pinned, since HTTPS needs the hostname for SNI and
+        certificate checks.
+        """
+        self._server_resolved_at = time.monotonic()
+        parts = urlsplit(self.server_state_api_url)
+        if parts.scheme != "http" or not parts.hostname:
+            return
+
+        try:
+            server_ip = socket.gethostbyname(parts.hostname)
+        except OSError as e:
+            logger.warning(
+                "Unable to resolve %s, using hostname: %s", parts.hostname, e
+            )
+            self.state_api_url = self.server_state_api_url
+            self.session.headers.pop("Host", None)
+            return
+
+        netloc = f"{server_ip}:{parts.port}" if parts.port else server_ip
+        self.state_api_url = parts._replace(netloc=netloc).geturl()
+        self.session.headers["Host"] = parts.netloc
+        logger.info("Resolved server %s to %s", parts.hostname, server_ip)
 
     def lock_workstation(self) -> bool:
         """Lock the Windows workstation"""
         try:
-            result = self.user32.LockWorkStation()
+            result = self._LockWorkStation()
             if result:
                 logger.info("Workstation locked successfully")
                 self.is_locked = True
@@ -38,115 +184,163 @@ class WindowsLocker:
                 logger.error("Failed to lock workstation")
                 return False
         except Exception as e:
-            logger.error(f"Error locking workstation: {e}")
+            logger.error("Error locking workstation: %s", e)
             return False
 
-    def check_unlock_condition(self) -> bool:
-        """Check API for unlock condition"""
+    def _fetch_state(self) -> Optional[dict]:
+        """Fetch unlock status and DNS timer from the API in one request
+
+        Long-polls the server: the request returns as soon as the client's
+        configuration changes, or after about poll_interval otherwise. The
+        result is stored for the DNS manager thread.
+        """
+        if time.monotonic() - self._server_resolved_at > self.DNS_REFRESH_SECONDS:
+            self.resolve_server_address()
+
+        wait = self.jittered_poll_interval()
+        params = {"wait": wait}
+        if self._state_version is not None:
+            params["version"] = self._state_version
+
+        # Transport errors are already retried by the session's adapter;
+        # only malformed responses are retried here
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = requests.get(self.api_url, timeout=5)
+                response = self.session.get(
+                    self.state_api_url, params=params, timeout=wait + 5
+                )
                 response.raise_for_status()
+            except requests.RequestException as e:
+                logger.error("Error fetching client state: %s", e)
+                self._state_version = None
+                if isinstance(e, requests.ConnectionError):
+                    # The pinned address may be stale; resolve it again
+                    self.resolve_server_address()
+                return None
+
+            try:
                 data = response.json()
 
-                # API returns {"unlock": true/false} or similar
-                should_unlock = data.get("unlock", False)
-                logger.info(f"Unlock condition: {should_unlock}")
-                return should_unlock
+                # API returns {"unlock": ..., "timer_seconds": ..., "version": n}
+                self._state_version = data.get("version")
+                poll_interval = data.get("poll_interval_seconds")
+                if poll_interval and isinstance(poll_interval, (int, float)):
+                    self.poll_interval = max(1, poll_interval)
+                with self._state_lock:
+                    self._latest_state = data
+                self._state_ready.set()
+                return data
 
-            except requests.RequestException as e:
-                logger.error(
-                    f"Error checking unlock condition (attempt {attempt + 1}/{max_retries}): {e}"
-                )
-                if attempt < max_retries - 1:
-                    time.sleep(2)  # Wait before retry
-                    continue
-                return False
             except Exception as e:
                 logger.error(
-                    f"Error parsing unlock response (attempt {attempt + 1}/{max_retries}): {e}"
+                    "Error parsing state response (attempt %s/%s): %s",
+                    attempt + 1,
+                    max_retries,
+                    e,
                 )
                 if attempt < max_retries - 1:
-                    time.sleep(2)  # Wait before retry
-                    continue
-                return False
-        return False
+                    # Exponential backoff with jitter so clients don't retry
+                    # in lockstep
+                    time.sleep(random.uniform(0.5, min(8, 2 ** (attempt + 1))))
 
-    def get_dns_timer_value(self) -> Optional[int]:
-        """Get timer value from API for DNS operations"""
-        try:
-            response = requests.get(self.dns_timer_api_url, timeout=5)
-            response.raise_for_status()
-            data = response.json()
+        self._state_version = None
+        return None
 
-            # Assuming API returns {"timer_seconds": 300} or similar
-            timer_value = data.get("timer_seconds")
-            if timer_value and isinstance(timer_value, (int, str)):
-                return int(timer_value)
+    def check_unlock_condition(self) -> bool:
+        """Check API for unlock condition"""
+        state = self._fetch_state()
+        if state is None:
+            return False
+
+        should_unlock = state.get("unlock", False)
+        logger.info("Unlock condition: %s", should_unlock)
+        return should_unlock
+
+    def jittered_poll_interval(self) -> float:
+        """Poll interval with +/-20% jitter so clients don't poll in lockstep"""
+        return self.poll_interval * random.uniform(0.8, 1.2)
 
-            logger.warning("No valid timer value found in API response")
+    def get_dns_timer_value(self) -> Optional[int]:
+        """Get timer value for DNS operations from the latest fetched state"""
+        # stop_dns_manager also sets _state_ready so this returns on shutdown
+        self._state_ready.wait(self.STATE_READY_TIMEOUT)
+        if self._stop_event.is_set():
             return None
 
-        except requests.RequestException as e:
-            logger.error(f"Error getting DNS timer value: {e}")
+        with self._state_lock:
+            state = self._latest_state
+        if state is None:
+            logger.warning("No client state fetched yet")
             return None
-        except Exception as e:
-            logger.error(f"Error parsing DNS timer response: {e}")
+
+        timer_value = state.get("timer_seconds")
+
+        try:
+            if timer_value and isinstance(timer_value, (int, str)):
+                return int(timer_value)
+        except ValueError as e:
+            logger.error("Error parsing DNS timer value: %s", e)
             return None
 
+        logger.warning("No valid timer value found in client state")
+        return None
+
     def flush_dns_cache(self) -> bool:
         """Flush Windows DNS cache"""
         try:
-            # Use ipconfig to flush DNS cache
-            result = subprocess.run(
-                ["ipconfig", "/flushdns"], capture_output=True, text=True, timeout=10
-            )
-            if result.returncode == 0:
+            if self._DnsFlushResolverCache():
                 logger.info("DNS cache flushed successfully")
                 return True
             else:
-                logger.error(f"Failed to flush DNS cache: {result.stderr}")
+                logger.error("Failed to flush DNS cache")
                 return False
         except Exception as e:
-            logger.error(f"Error flushing DNS cache: {e}")
+            logger.error("Error flushing DNS cache: %s", e)
             return False
 
     def modify_hosts_file(self) -> bool:
         """Add YouTube domains to hosts file pointing to 127.0.0.1"""
-        youtube_domains = [
-            "youtube.com",
-            "www.youtube.com",
-            "m.youtube.com",
-            "youtu.be",
-        ]
-
-        hosts_path = r"C:\Windows\System32\drivers\etc\hosts"
+        hosts_path = self.HOSTS_PATH
+        tmp_path = hosts_path + ".tmp"
 
         try:
-            # Read current hosts file
-            with open(hosts_path, "r") as f:
-                hosts_content = f.read()
+            # Skip re-reading if the file hasn't changed since the last run
+            mtime = os.stat(hosts_path).st_mtime
+            if mtime == self._hosts_mtime:
+                logger.info("Hosts file unchanged since last check")
+                return True
 
-            # Check if YouTube entries already exist
-            new_entries = []
-            for domain in youtube_domains:
-                entry = f"127.0.0.1 {domain}"
-                if entry not in hosts_content:
-                    new_entries.append(entry)
+            # Check and copy from one handle so the rewrite is based on the
+            # same content that was checked
+            with open(hosts_path, "rb") as src:
+                # Check if YouTube entries already exist, reading line by line
+                existing = {line.decode(errors="replace").strip() for line in src}
+                new_entries = sorted(self.BLOCKED_HOSTS_ENTRIES - existing)
+
+                if new_entries:
+                    # Rewrite via a temp file so the hosts file is never left
+                    # half-written
+                    payload = os.linesep.join(
+                        ["", "# Added by Windows Locker", *new_entries, ""]
+                    ).encode()
+                    src.seek(0)
+                    with open(tmp_path, "wb") as f:
+                        shutil.copyfileobj(src, f)
+                        f.write(payload)
 
             if new_entries:
-                # Add new entries
-                with open(hosts_path, "a") as f:
-                    f.write("\n# Added by Windows Locker\n")
-                    for entry in new_entries:
-                        f.write(entry + "\n")
-
-                logger.info(f"Added {len(new_entries)} YouTube entries to hosts file")
-                return True
+                # Replace only after the source handle is closed; Windows
+                # can't replace a file that is still open
+                os.replace(tmp_path, hosts_path)
+                logger.info(
+                    "Added %s YouTube entries to hosts file", len(new_entries)
+                )
             else:
                 logger.info("YouTube entries already exist in hosts file")
-                return True
+
+            self._hosts_mtime = os.stat(hosts_path).st_mtime
+            return True
 
         except PermissionError:
             logger.error(
@@ -154,49 +348,58 @@ class WindowsLocker:
             )
             return False
         except Exception as e:
-            logger.error(f"Error modifying hosts file: {e}")
+            logger.error("Error modifying hosts file: %s", e)
             return False
+        finally:
+            # Don't leave a partial temp file in the etc directory on failure
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError as e:
+                    logger.warning("Unable to remove %s: %s", tmp_path, e)
 
     def dns_manager_loop(self):
         """Background thread to manage DNS operations"""
         logger.info("DNS manager thread started")
 
-        while not self.stop_dns_thread:
+        while not self._stop_event.is_set():
             try:
                 # Get timer value from API
                 timer_seconds = self.get_dns_timer_value()
+                if self._stop_event.is_set():
+                    break
 
                 if timer_seconds:
                     logger.info(
-                        f"Waiting {timer_seconds} seconds before DNS operations"
+                        "Waiting %s seconds before DNS operations", timer_seconds
                     )
 
-                    # Wait for the specified time
-                    for _ in range(timer_seconds):
-                        if self.stop_dns_thread:
-                            break
-                        time.sleep(1)
-
-                    if not self.stop_dns_thread:
-                        # Perform DNS operations
-                        logger.info("Performing DNS operations...")
-                        self.flush_dns_cache()
-                        self.modify_hosts_file()
+                    # Wait for the specified time, returning early on stop
+                    if self._stop_event.wait(timer_seconds):
+                        break
+
+                    # Perform DNS operations
+                    logger.info("Performing DNS operations...")
+                    self.flush_dns_cache()
+                    self.modify_hosts_file()
                 else:
                     # Default timer if API fails
                     logger.warning("Using default timer (300 seconds)")
-                    time.sleep(300)
+                    self._stop_event.wait(300)
 
             except Exception as e:
-                logger.error(f"Error in DNS manager loop: {e}")
-                time.sleep(60)  # Wait 1 minute before retrying
+                logger.error("Error in DNS manager loop: %s", e)
+                self._stop_event.wait(60)  # Wait 1 minute before retrying
 
         logger.info("DNS manager thread stopped")
 
     def start_dns_manager(self):
         """Start the DNS management background thread"""
         if self.dns_thread is None or not self.dns_thread.is_alive():
-            self.stop_dns_thread = False
+            self._stop_event.clear()
+            with self._state_lock:
+                if self._latest_state is None:
+                    self._state_ready.clear()
             self.dns_thread = threading.Thread(
                 target=self.dns_manager_loop, daemon=True
             )
@@ -205,20 +408,128 @@ class WindowsLocker:
 
     def stop_dns_manager(self):
         """Stop the DNS management background thread"""
-        self.stop_dns_thread = True
+        self._stop_event.set()
+        # Release a DNS thread still waiting for the first state fetch
+        self._state_ready.set()
         if self.dns_thread and self.dns_thread.is_alive():
             self.dns_thread.join(timeout=5)
-            logger.info("DNS manager thread stopped")
+            if self.dns_thread.is_alive():
+                logger.warning("DNS manager thread did not stop in time")
+            else:
+                logger.info("DNS manager thread stopped")
+        self.session.close()
+
+    def session_window_proc(self, hwnd, msg, wparam, lparam):
+        """Handle messages for the session notification window"""
+        if msg == WM_WTSSESSION_CHANGE:
+            if wparam == WTS_SESSION_LOCK:
+                logger.info("Session locked")
+                self._session_locked = True
+                self.is_locked = True
+            elif wparam == WTS_SESSION_UNLOCK:
+                logger.info("Session unlocked")
+                self._session_locked = False
+                # Re-lock right away if the server still says locked
+                self.enforce_lock_state(self.should_be_unlocked)
+            return 0
+        if msg == WM_DESTROY:
+            # Must unregister while the window still exists
+            self.wtsapi32.WTSUnRegisterSessionNotification(
+                ctypes.wintypes.HWND(hwnd)
+            )
+            self.user32.PostQuitMessage(0)
+            return 0
+        return self.user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+    def session_monitor_loop(self, ready: threading.Event):
+        """Background thread that receives session lock/unlock notifications"""
+        hinstance = ctypes.wintypes.HINSTANCE(self.kernel32.GetModuleHandleW(None))
+        self._session_wndproc = WNDPROC(self.session_window_proc)
+        wndclass = WNDCLASSW()
+        wndclass.lpfnWndProc = self._session_wndproc
+        wndclass.hInstance = hinstance
+        wndclass.lpszClassName = self.SESSION_WINDOW_CLASS
+
+        try:
+            if not self.user32.RegisterClassW(ctypes.byref(wndclass)):
+                logger.error("Failed to register session notification window class")
+                return
+            hwnd = ctypes.wintypes.HWND(
+                self.user32.CreateWindowExW(
+                    0,
+                    wndclass.lpszClassName,
+                    wndclass.lpszClassName,
+                    0,
+                    0,
+                    0,
+                    0,
+                    0,
+                    HWND_MESSAGE,
+                    None,
+                    hinstance,
+                    None,
+                )
+            )
+            if not hwnd.value:
+                logger.error("Failed to create session notification window")
+                self.user32.UnregisterClassW(self.SESSION_WINDOW_CLASS, hinstance)
+                return
+            if not self.wtsapi32.WTSRegisterSessionNotification(
+                hwnd, NOTIFY_FOR_THIS_SESSION
+            ):
+                logger.error("Failed to register for session notifications")
+                self.user32.DestroyWindow(hwnd)
+                self.user32.UnregisterClassW(self.SESSION_WINDOW_CLASS, hinstance)
+                return
+
+            # Seed the state once; notifications keep it current from here
+            self._session_locked = not self._GetForegroundWindow()
+            self._session_hwnd = hwnd
+        finally:
+            ready.set()
+
+        logger.info("Session monitor thread started")
+        msg = ctypes.wintypes.MSG()
+        while self.user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            self.user32.TranslateMessage(ctypes.byref(msg))
+            self.user32.DispatchMessageW(ctypes.byref(msg))
+
+        # The class points at this thread's WNDPROC; unregister it so a later
+        # start registers the class again with a live callback
+        self.user32.UnregisterClassW(self.SESSION_WINDOW_CLASS, hinstance)
+        self._session_hwnd = None
+        self._session_locked = None
+        logger.info("Session monitor thread stopped")
+
+    def start_session_monitor(self):
+        """Start the session lock/unlock notification thread"""
+        if self.session_thread is None or not self.session_thread.is_alive():
+            ready = threading.Event()
+            self.session_thread = threading.Thread(
+                target=self.session_monitor_loop, args=(ready,), daemon=True
+            )
+            self.session_thread.start()
+            ready.wait(timeout=5)
+
+    def stop_session_monitor(self):
+        """Stop the session lock/unlock notification thread"""
+        if self._session_hwnd:
+            self.user32.PostMessageW(self._session_hwnd, WM_CLOSE, 0, 0)
+        if self.session_thread and self.session_thread.is_alive():
+            self.session_thread.join(timeout=5)
 
     def is_workstation_locked(self) -> bool:
         """Check if the workstation is currently locked"""
+        if self._session_locked is not None:
+            return self._session_locked
+
         try:
             # Use a more reliable method to detect if workstation is locked
             # Check if there's any foreground window - if not, likely locked
-            hwnd = self.user32.GetForegroundWindow()
-            return hwnd == 0
+            hwnd = self._GetForegroundWindow()
+            return not hwnd  # NULL comes back as None with c_void_p
         except Exception as e:
-            logger.error(f"Error checking workstation lock state: {e}")
+            logger.error("Error checking workstation lock state: %s", e)
             return False
 
     def enforce_lock_state(self, should_be_unlocked: bool):
@@ -243,54 +554,61 @@ class WindowsLocker:
             )
             self.is_locked = False
 
+    def run(self):
+        """Main application loop"""
+        logger.info("Starting Windows Locker application")
 
-def run(self):
-    """Main application loop"""
-    logger.info("Starting Windows Locker application")
+        # Start DNS manager and session lock/unlock notifications
+        self.start_dns_manager()
+        self.start_session_monitor()
 
-    # Start DNS manager
-    self.start_dns_manager()
+        consecutive_errors = 0
+        max_consecutive_errors = 5
 
-    consecutive_errors = 0
-    max_consecutive_errors = 5
-
-    try:
-        while True:
-            try:
-                # Always check the server for the current state
-                should_be_unlocked = self.check_unlock_condition()
-
-                # Reset error counter on successful check
-                consecutive_errors = 0
+        try:
+            while True:
+                try:
+                    # Always check the server for the current state
+                    self.should_be_unlocked = self.check_unlock_condition()
 
-                # Enforce the server's lock state
-                self.enforce_lock_state(should_be_unlocked)
+                    # Reset error counter on successful check
+                    consecutive_errors = 0
 
-                # Wait before next check
-                time.sleep(5)
+                    # Enforce the server's lock state; user unlocks in between
+                    # are handled by the session monitor
+                    self.enforce_lock_state(self.should_be_unlocked)
 
-            except Exception as e:
-                consecutive_errors += 1
-                logger.error(
-                    f"Error in main loop (consecutive errors: {consecutive_errors}): {e}"
-                )
+                    # The long-poll paces the loop; a failed check (or a server
+                    # without versions) returns at once, so fall back to a sleep
+                    if self._state_version is None:
+                        time.sleep(self.jittered_poll_interval())
 
-                if consecutive_errors >= max_consecutive_errors:
+                except Exception as e:
+                    consecutive_errors += 1
                     logger.error(
-                        f"Too many consecutive errors ({max_consecutive_errors}), locking workstation for safety"
+                        "Error in main loop (consecutive errors: %s): %s",
+                        consecutive_errors,
+                        e,
                     )
-                    self.lock_workstation()
-                    consecutive_errors = 0  # Reset after taking safety action
 
-                # Wait longer after errors
-                time.sleep(10)
+                    if consecutive_errors >= max_consecutive_errors:
+                        logger.error(
+                            "Too many consecutive errors (%s), locking workstation for safety",
+                            max_consecutive_errors,
+                        )
+                        self.lock_workstation()
+                        consecutive_errors = 0  # Reset after taking safety action
 
-    except KeyboardInterrupt:
-        logger.info("Application stopped by user")
-    except Exception as e:
-        logger.error(f"Unexpected error in main loop: {e}")
-    finally:
-        self.stop_dns_manager()
+                    # Wait longer after errors
+                    time.sleep(10)
+
+        except KeyboardInterrupt:
+            logger.info("Application stopped by user")
+        except Exception as e:
+            logger.error("Unexpected error in main loop: %s", e)
+        finally:
+            self.stop_session_monitor()
+            self.stop_dns_manager()
 
 
 def main():
@@ -303,14 +621,13 @@ def main():
         import socket
 
         client_name = socket.gethostname()
-        logger.info(f"No client name provided, using hostname: {client_name}")
+        logger.info("No client name provided, using hostname: %s", client_name)
 
     # Configuration - update these URLs
     SERVER_URL = "http://localhost:8000"
-    API_URL = f"{SERVER_URL}/client/{client_name}/unlock-status"
-    DNS_TIMER_API_URL = f"{SERVER_URL}/client/{client_name}/youtube-timer"
+    STATE_API_URL = f"{SERVER_URL}/client/{client_name}/state"
 
-    logger.info(f"Starting client '{client_name}' connecting to {SERVER_URL}")
+    logger.info("Starting client '%s' connecting to %s", client_name, SERVER_URL)
 
     # Check if running as administrator for DNS operations
     try:
@@ -323,7 +640,7 @@ def main():
         logger.warning("Unable to check administrator status")
 
     # Create and run the locker
-    locker = WindowsLocker(API_URL, DNS_TIMER_API_URL)
+    locker = WindowsLocker(STATE_API_URL)
     locker.run()
 
 
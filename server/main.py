@@ -1,11 +1,14 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from typing import Dict, Optional
+from fastapi.responses import FileResponse, Response
+from pydantic import BaseModel, Field
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
 import time
 from datetime import datetime, timedelta
-import json
+import orjson
 import os
 
 app = FastAPI(
@@ -21,6 +24,7 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 class ClientConfig(BaseModel):
     unlock_allowed: bool = False
     youtube_timer_seconds: int = 300
+    poll_interval_seconds: int = Field(5, ge=1)
     last_updated: Optional[datetime] = None
 
 
@@ -34,27 +38,76 @@ class YouTubeTimerRequest(BaseModel):
     timer_seconds: int
 
 
+# Internal storage; ClientConfig is only used to validate request bodies
+@dataclass(slots=True)
+class ClientState:
+    unlock_allowed: bool = False
+    youtube_timer_seconds: int = 300
+    poll_interval_seconds: int = 5
+    last_updated: Optional[datetime] = None
+
+    def update_from(self, config: ClientConfig, now: datetime):
+        """Apply the fields set in a request; omitted ones keep their value"""
+        for field, value in config.model_dump(exclude_unset=True).items():
+            setattr(self, field, value)
+        self.last_updated = now
+
+
+def new_client_state() -> ClientState:
+    """Auto-register a new client with default locked state"""
+    mark_dirty()
+    return ClientState(
+        unlock_allowed=False, youtube_timer_seconds=300, last_updated=datetime.now()
+    )
+
+
 # In-memory storage for client configurations
 # In production, this should be replaced with a database
-client_configs: Dict[str, ClientConfig] = {}
+client_configs: defaultdict[str, ClientState] = defaultdict(new_client_state)
 
 # Configuration file path
 CONFIG_FILE = "client_configs.json"
 
+# Seconds to coalesce config changes before writing them to disk
+SAVE_DEBOUNCE_SECONDS = 0.5
+
+# Set by handlers when client_configs changes; consumed by config_writer.
+# Created in startup_event so each run gets events bound to its own loop.
+dirty_event: Optional[asyncio.Event] = None
+# Set on shutdown so config_writer exits after any write in progress
+writer_stop_event: Optional[asyncio.Event] = None
+config_writer_task: Optional[asyncio.Task] = None
+
+# Longest a client may hold an unlock-status long-poll open
+MAX_LONG_POLL_SECONDS = 60
+
+# Per-client change counters; long-polls wait on config_changed for a bump.
+# The Condition is created in startup_event so it binds to the running loop.
+client_versions: defaultdict[str, int] = defaultdict(int)
+config_changed: Optional[asyncio.Condition] = None
+
+# Serialized unlock-status and state responses keyed by client, tagged with
+# the version they were built from; a version bump makes the entry stale
+unlock_status_cache: Dict[str, Tuple[int, bytes]] = {}
+client_state_cache: Dict[str, Tuple[int, bytes]] = {}
+
 
 def load_configs():
     """Load client configurations from file"""
     global client_configs
     if os.path.exists(CONFIG_FILE):
         try:
-            with open(CONFIG_FILE, "r") as f:
-                data = json.load(f)
+            with open(CONFIG_FILE, "rb") as f:
+                data = orjson.loads(f.read())
                 for client_name, config_data in data.items():
-                    client_configs[client_name] = ClientConfig(
+                    client_configs[client_name] = ClientState(
                         unlock_allowed=config_data.get("unlock_allowed", False),
                         youtube_timer_seconds=config_data.get(
                             "youtube_timer_seconds", 300
                         ),
+                        poll_interval_seconds=config_data.get(
+                            "poll_interval_seconds", 5
+                        ),
                         last_updated=datetime.fromisoformat(config_data["last_updated"])
                         if config_data.get("last_updated")
                         else None,
@@ -67,28 +120,96 @@ def load_configs():
 def save_configs():
     """Save client configurations to file"""
     try:
-        data = {}
-        for client_name, config in client_configs.items():
-            data[client_name] = {
-                "unlock_allowed": config.unlock_allowed,
-                "youtube_timer_seconds": config.youtube_timer_seconds,
-                "last_updated": config.last_updated.isoformat()
-                if config.last_updated
-                else None,
-            }
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(data, f, indent=2)
+        # Snapshot first: this runs in a worker thread while handlers insert.
+        # orjson serializes the ClientState dataclasses and datetimes natively.
+        data = orjson.dumps(dict(client_configs), option=orjson.OPT_INDENT_2)
+        # Write to a temp file and swap it in so a crash can't truncate it
+        tmp_path = CONFIG_FILE + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, CONFIG_FILE)
     except Exception as e:
         print(f"Error saving configs: {e}")
 
 
+def mark_dirty():
+    """Schedule a debounced save of client configurations"""
+    if dirty_event is not None:
+        dirty_event.set()
+
+
+async def notify_config_changed(*client_names: str):
+    """Bump clients' versions, wake their long-polls and schedule a save"""
+    async with config_changed:
+        for client_name in client_names:
+            client_versions[client_name] += 1
+        config_changed.notify_all()
+    mark_dirty()
+
+
+async def wait_for_config_change(
+    client_name: str, wait: float, version: Optional[int]
+):
+    """Wait up to ``wait`` seconds for a client's version to move past ``version``"""
+    wait = min(wait, MAX_LONG_POLL_SECONDS)
+    if wait > 0 and version == client_versions[client_name]:
+        async with config_changed:
+            try:
+                await asyncio.wait_for(
+                    config_changed.wait_for(
+                        lambda: client_versions[client_name] != version
+                    ),
+                    wait,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+def cached_client_response(
+    cache: Dict[str, Tuple[int, bytes]],
+    client_name: str,
+    build: Callable[[ClientState, int], Dict[str, Any]],
+) -> Response:
+    """Return a client's serialized response, rebuilding it if stale"""
+    current_version = client_versions[client_name]
+    cached = cache.get(client_name)
+    if cached is None or cached[0] != current_version:
+        content = orjson.dumps(build(client_configs[client_name], current_version))
+        cached = cache[client_name] = (current_version, content)
+
+    return Response(content=cached[1], media_type="application/json")
+
+
+async def config_writer():
+    """Background task that writes pending config changes to file"""
+    while not writer_stop_event.is_set():
+        await dirty_event.wait()
+        dirty_event.clear()
+        if writer_stop_event.is_set():
+            break
+        # Let further updates within the window share this write
+        await asyncio.sleep(SAVE_DEBOUNCE_SECONDS)
+        await asyncio.to_thread(save_configs)
+
+
 @app.on_event("startup")
 async def startup_event():
+    global config_writer_task, dirty_event, writer_stop_event, config_changed
+    dirty_event = asyncio.Event()
+    writer_stop_event = asyncio.Event()
+    config_changed = asyncio.Condition()
     load_configs()
+    config_writer_task = asyncio.create_task(config_writer())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    # Stop the writer cooperatively: cancelling it would abandon an in-flight
+    # save_configs thread that the final save below would then race with
+    if config_writer_task:
+        writer_stop_event.set()
+        dirty_event.set()
+        await config_writer_task
     save_configs()
 
 
@@ -111,9 +232,8 @@ async def list_clients():
                 "name": name,
                 "unlock_allowed": config.unlock_allowed,
                 "youtube_timer_seconds": config.youtube_timer_seconds,
-                "last_updated": config.last_updated.isoformat()
-                if config.last_updated
-                else None,
+                "poll_interval_seconds": config.poll_interval_seconds,
+                "last_updated": config.last_updated,
             }
             for name, config in client_configs.items()
         ],
@@ -122,60 +242,75 @@ async def list_clients():
 
 
 @app.get("/client/{client_name}/unlock-status")
-async def get_unlock_status(client_name: str):
-    """Get unlock status for a specific client"""
-    if client_name not in client_configs:
-        # Auto-register new clients with default locked state
-        client_configs[client_name] = ClientConfig(
-            unlock_allowed=False, youtube_timer_seconds=300, last_updated=datetime.now()
-        )
-        save_configs()
-
-    config = client_configs[client_name]
-    return {
-        "client_name": client_name,
-        "unlock": config.unlock_allowed,
-        "last_updated": config.last_updated.isoformat()
-        if config.last_updated
-        else None,
-    }
+async def get_unlock_status(
+    client_name: str, wait: float = 0, version: Optional[int] = None
+):
+    """Get unlock status for a specific client
+
+    If ``version`` matches the client's current version, hold the request
+    open for up to ``wait`` seconds until the configuration changes.
+    """
+    await wait_for_config_change(client_name, wait, version)
+    return cached_client_response(
+        unlock_status_cache,
+        client_name,
+        lambda config, current_version: {
+            "client_name": client_name,
+            "unlock": config.unlock_allowed,
+            "poll_interval_seconds": config.poll_interval_seconds,
+            "version": current_version,
+            "last_updated": config.last_updated,
+        },
+    )
+
+
+@app.get("/client/{client_name}/state")
+async def get_client_state(
+    client_name: str, wait: float = 0, version: Optional[int] = None
+):
+    """Get unlock status and YouTube timer for a specific client at once
+
+    Long-polls like the unlock-status endpoint.
+    """
+    await wait_for_config_change(client_name, wait, version)
+    return cached_client_response(
+        client_state_cache,
+        client_name,
+        lambda config, current_version: {
+            "client_name": client_name,
+            "unlock": config.unlock_allowed,
+            "timer_seconds": config.youtube_timer_seconds,
+            "poll_interval_seconds": config.poll_interval_seconds,
+            "version": current_version,
+            "last_updated": config.last_updated,
+        },
+    )
 
 
 @app.post("/client/{client_name}/unlock-status")
 async def set_unlock_status(client_name: str, request: LockRequest):
     """Set unlock status for a specific client"""
-    if client_name not in client_configs:
-        client_configs[client_name] = ClientConfig()
-
-    client_configs[client_name].unlock_allowed = request.unlock_allowed
-    client_configs[client_name].last_updated = datetime.now()
-    save_configs()
+    config = client_configs[client_name]
+    config.unlock_allowed = request.unlock_allowed
+    config.last_updated = datetime.now()
+    await notify_config_changed(client_name)
 
     return {
         "client_name": client_name,
         "unlock": request.unlock_allowed,
         "message": f"Unlock status updated for {client_name}",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
     }
 
 
 @app.get("/client/{client_name}/youtube-timer")
 async def get_youtube_timer(client_name: str):
     """Get YouTube timer for a specific client"""
-    if client_name not in client_configs:
-        # Auto-register new clients with default timer
-        client_configs[client_name] = ClientConfig(
-            unlock_allowed=False, youtube_timer_seconds=300, last_updated=datetime.now()
-        )
-        save_configs()
-
     config = client_configs[client_name]
     return {
         "client_name": client_name,
         "timer_seconds": config.youtube_timer_seconds,
-        "last_updated": config.last_updated.isoformat()
-        if config.last_updated
-        else None,
+        "last_updated": config.last_updated,
     }
 
 
@@ -185,18 +320,16 @@ async def set_youtube_timer(client_name: str, request: YouTubeTimerRequest):
     if request.timer_seconds < 0:
         raise HTTPException(status_code=400, detail="Timer seconds must be positive")
 
-    if client_name not in client_configs:
-        client_configs[client_name] = ClientConfig()
-
-    client_configs[client_name].youtube_timer_seconds = request.timer_seconds
-    client_configs[client_name].last_updated = datetime.now()
-    save_configs()
+    config = client_configs[client_name]
+    config.youtube_timer_seconds = request.timer_seconds
+    config.last_updated = datetime.now()
+    await notify_config_changed(client_name)
 
     return {
         "client_name": client_name,
         "timer_seconds": request.timer_seconds,
         "message": f"YouTube timer updated for {client_name}",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
     }
 
 
@@ -207,7 +340,9 @@ async def delete_client(client_name: str):
         raise HTTPException(status_code=404, detail="Client not found")
 
     del client_configs[client_name]
-    save_configs()
+    unlock_status_cache.pop(client_name, None)
+    client_state_cache.pop(client_name, None)
+    await notify_config_changed(client_name)
 
     return {"message": f"Client {client_name} deleted successfully"}
 
@@ -215,19 +350,44 @@ async def delete_client(client_name: str):
 # Management endpoints for bulk operations
 @app.post("/clients/{client_name}/configure")
 async def configure_client(client_name: str, config: ClientConfig):
-    """Configure all settings for a client at once"""
-    config.last_updated = datetime.now()
-    client_configs[client_name] = config
-    save_configs()
+    """Configure settings for a client at once; omitted ones are kept"""
+    client_configs[client_name].update_from(config, datetime.now())
+    await notify_config_changed(client_name)
 
     return {
         "client_name": client_name,
         "message": "Client configured successfully",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
+    }
+
+
+@app.post("/clients/bulk-configure")
+async def bulk_configure_clients(configs: Dict[str, ClientConfig]):
+    """Configure settings for several clients in one request"""
+    now = datetime.now()
+    for client_name, config in configs.items():
+        client_configs[client_name].update_from(config, now)
+    await notify_config_changed(*configs)
+
+    return {
+        "clients": list(configs),
+        "total_configured": len(configs),
+        "message": "Clients configured successfully",
+        "timestamp": now,
     }
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop is POSIX-only; Windows keeps the default asyncio loop. A single
+    # worker is required since client state, long-polls and the config
+    # writer all live in this process.
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+    )
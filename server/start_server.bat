@@ -1,5 +1,5 @@
 @echo off
 echo Starting Windows Locker Server...
 cd /d "%~dp0"
-uv run uvicorn main:app --host 0.0.0.0 --port 8000 --reload
+uv run uvicorn main:app --host 0.0.0.0 --port 8000 --http httptools --reload
 pause
\ No newline at end of file